@@ -0,0 +1,154 @@
+"""Liveness and readiness probes for load balancers and Render health checks.
+
+`HealthCheckMiddleware` sits first in MIDDLEWARE and answers the probe paths
+directly, so probes skip sessions, CSRF, auth and URL resolution.
+
+- `/health/` (liveness) only proves the process can serve a request.
+- `/ready/` (readiness) checks the database, cache and Celery broker with a
+  tight timeout each, and caches the outcome for a few seconds so frequent
+  probes cost at most one round of checks per process per interval.
+
+Each check runs in its own short-lived daemon thread, so a dependency that
+hangs past its timeout can't starve later probes. Failure details are logged,
+never returned: the response only says `ok`, `error` or `timeout`.
+"""
+import copy
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.utils import load_backend
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'ALX Travel App API'
+
+_lock = threading.Lock()
+_cached = {'expires': 0.0, 'ready': False, 'checks': {}}
+
+
+def _check_database():
+    """Run `SELECT 1` on a dedicated connection with connect/statement timeouts."""
+    timeout = settings.HEALTH_CHECK_TIMEOUT
+    db_settings = copy.deepcopy(connections.settings['default'])
+    options = db_settings.setdefault('OPTIONS', {})
+    if 'postgresql' in db_settings['ENGINE']:
+        # libpq rounds connect_timeout to whole seconds (minimum 2).
+        options['connect_timeout'] = max(2, round(timeout))
+        options['options'] = f"{options.get('options', '')} -c statement_timeout={int(timeout * 1000)}".strip()
+    elif 'sqlite' in db_settings['ENGINE']:
+        options['timeout'] = timeout
+
+    connection = load_backend(db_settings['ENGINE']).DatabaseWrapper(db_settings, 'health')
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    finally:
+        connection.close()
+
+
+def _check_cache():
+    cache.set('health:readiness', 'ok', timeout=10)
+    if cache.get('health:readiness') != 'ok':
+        raise RuntimeError('cache read-back mismatch')
+
+
+def _check_broker():
+    from alx_travel_app.celery import app
+
+    timeout = settings.HEALTH_CHECK_TIMEOUT
+    with app.connection_for_write(connect_timeout=timeout) as connection:
+        connection.ensure_connection(max_retries=1, timeout=timeout)
+
+
+CHECKS = {
+    'database': _check_database,
+    'cache': _check_cache,
+    'broker': _check_broker,
+}
+
+
+def _run_check(name, check, outcome):
+    try:
+        check()
+        outcome['result'] = 'ok'
+    except Exception:
+        logger.exception(f"Readiness check {name} failed")
+        outcome['result'] = 'error'
+
+
+def run_checks():
+    """Run all dependency checks concurrently; returns (ready, {name: result})."""
+    timeout = settings.HEALTH_CHECK_TIMEOUT
+    running = {}
+    for name, check in CHECKS.items():
+        outcome = {}
+        thread = threading.Thread(
+            target=_run_check, args=(name, check, outcome), name=f'readiness-{name}', daemon=True,
+        )
+        thread.start()
+        running[name] = (thread, outcome)
+
+    deadline = time.monotonic() + timeout
+    results = {}
+    for name, (thread, outcome) in running.items():
+        thread.join(max(deadline - time.monotonic(), 0))
+        if thread.is_alive():
+            logger.warning(f"Readiness check {name} timed out after {timeout}s")
+            results[name] = 'timeout'
+        else:
+            results[name] = outcome['result']
+    return all(result == 'ok' for result in results.values()), results
+
+
+def liveness(request):
+    """Liveness endpoint: the process is up and serving requests."""
+    return JsonResponse({'status': 'healthy', 'service': SERVICE_NAME})
+
+
+def readiness(request):
+    """Readiness endpoint: 200 when all dependencies answer, 503 otherwise."""
+    now = time.monotonic()
+    if _cached['expires'] <= now:
+        with _lock:
+            if _cached['expires'] <= time.monotonic():
+                ready, checks = run_checks()
+                _cached.update(
+                    ready=ready,
+                    checks=checks,
+                    expires=time.monotonic() + settings.HEALTH_READINESS_CACHE_SECONDS,
+                )
+
+    return JsonResponse(
+        {
+            'status': 'ready' if _cached['ready'] else 'degraded',
+            'service': SERVICE_NAME,
+            'checks': _cached['checks'],
+        },
+        status=200 if _cached['ready'] else 503,
+    )
+
+
+PROBES = {
+    '/health/': liveness,
+    '/health': liveness,
+    '/ready/': readiness,
+    '/ready': readiness,
+}
+
+
+class HealthCheckMiddleware:
+    """Answer probe paths before the rest of the middleware stack runs."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        probe = PROBES.get(request.path_info)
+        if probe is not None and request.method in ('GET', 'HEAD'):
+            return probe(request)
+        return self.get_response(request)
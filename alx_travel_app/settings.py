@@ -3,6 +3,7 @@ from pathlib import Path
 import environ
 from celery.schedules import crontab
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 # ============================================================================
 # Django Settings for ALX Travel App
@@ -25,6 +26,9 @@ SECRET_KEY = env('SECRET_KEY', default='change-me-in-production')
 DEBUG = env('DEBUG', default=False)
 ALLOWED_HOSTS = env('ALLOWED_HOSTS').split(',')
 
+# Swagger/OpenAPI docs pull in the drf-yasg schema stack; opt-in outside DEBUG.
+ENABLE_API_DOCS = env.bool('ENABLE_API_DOCS', default=DEBUG)
+
 # ============================================================================
 # INSTALLED APPS & MIDDLEWARE
 # ============================================================================
@@ -37,11 +41,12 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'corsheaders',
-    'drf_yasg',
+    *(['drf_yasg'] if ENABLE_API_DOCS else []),
     'listings',
 ]
 
 MIDDLEWARE = [
+    'alx_travel_app.health.HealthCheckMiddleware',  # probes short-circuit here
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -81,6 +86,42 @@ WSGI_APPLICATION = 'alx_travel_app.wsgi.application'
 # ============================================================================
 DATABASES = {}
 DATABASES['default'] = dj_database_url.parse(env('DATABASE_URL'))
+
+# ============================================================================
+# CACHE
+# ============================================================================
+# Idempotency keys and locks must be shared by every gunicorn worker and
+# instance, so outside DEBUG the cache defaults to the Redis already used as
+# the Celery broker (CELERY_BROKER_URL, UPSTASH_REDIS_URL or REDIS_URL).
+# Set CACHE_URL to use a different store; a per-process memory cache is only
+# allowed in DEBUG.
+
+def _shared_cache_url():
+    for varname in ('CELERY_BROKER_URL', 'UPSTASH_REDIS_URL', 'REDIS_URL'):
+        url = env(varname, default='')
+        if url.startswith(('redis://', 'rediss://')):
+            return url
+    return 'redis://localhost:6379/0'
+
+CACHES = {
+    'default': env.cache_url('CACHE_URL', default='locmemcache://' if DEBUG else _shared_cache_url()),
+}
+CACHES['default'].setdefault('KEY_PREFIX', 'alx_travel_app')
+if not DEBUG and CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    raise ImproperlyConfigured(
+        'CACHE_URL must point to a shared cache (e.g. Redis) when DEBUG is off; '
+        'a per-process memory cache breaks Idempotency-Key guarantees.'
+    )
+
+# Health probes: per-dependency timeout and how long a readiness result is reused
+HEALTH_CHECK_TIMEOUT = env.float('HEALTH_CHECK_TIMEOUT', default=2.0)
+HEALTH_READINESS_CACHE_SECONDS = env.float('HEALTH_READINESS_CACHE_SECONDS', default=5.0)
+
+# Idempotency-Key handling for booking creation and payment initialization
+IDEMPOTENCY_KEY_TTL = env.int('IDEMPOTENCY_KEY_TTL', default=24 * 60 * 60)  # stored responses
+IDEMPOTENCY_LOCK_TIMEOUT = env.int('IDEMPOTENCY_LOCK_TIMEOUT', default=30)  # in-flight lock
+IDEMPOTENCY_WAIT_TIMEOUT = env.int('IDEMPOTENCY_WAIT_TIMEOUT', default=5)  # concurrent duplicate wait
+
 # ============================================================================
 # PASSWORD VALIDATION
 # ============================================================================
@@ -200,9 +241,31 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'listings.tasks.send_booking_reminders',
         'schedule': crontab(minute=0),  # Every hour at :00
     },
+    'rebuild-listing-stats': {
+        'task': 'listings.tasks.rebuild_listing_stats',
+        'schedule': crontab(hour=3, minute=0),  # 3 AM UTC daily
+    },
+    'dispatch-outbox': {
+        'task': 'listings.tasks.dispatch_outbox',
+        'schedule': 10.0,  # Every 10 seconds
+    },
+    'purge-outbox': {
+        'task': 'listings.tasks.purge_outbox',
+        'schedule': crontab(hour=4, minute=0),  # 4 AM UTC daily
+    },
 }
+LISTING_STATS_REBUILD_CHUNK_SIZE = env.int('LISTING_STATS_REBUILD_CHUNK_SIZE', default=200)
+
+# Transactional outbox dispatch (see listings.outbox)
+OUTBOX_BATCH_SIZE = env.int('OUTBOX_BATCH_SIZE', default=100)
+OUTBOX_MAX_ATTEMPTS = env.int('OUTBOX_MAX_ATTEMPTS', default=8)
+OUTBOX_CLAIM_TIMEOUT = 60  # seconds a claimed batch is leased to one dispatcher
+OUTBOX_BACKOFF_BASE = 30  # seconds, doubled per failed attempt
+OUTBOX_BACKOFF_MAX = 60 * 60  # 1 hour
 
 # ============================================================================
 # PAYMENT GATEWAY
 # ============================================================================
-CHAPA_SECRET_KEY = env('CHAPA_SECRET_KEY', default='')
\ No newline at end of file
+CHAPA_SECRET_KEY = env('CHAPA_SECRET_KEY', default='')
+CHAPA_TIMEOUT = env.float('CHAPA_TIMEOUT', default=10.0)  # seconds; keep below IDEMPOTENCY_LOCK_TIMEOUT
+PAYMENT_VERIFY_CACHE_TTL = env.int('PAYMENT_VERIFY_CACHE_TTL', default=24 * 60 * 60)  # finalized payments
\ No newline at end of file
@@ -1,35 +1,45 @@
+from functools import lru_cache
+
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from django.http import JsonResponse
 from django.views.generic import RedirectView
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-
-def health_check(request):
-    """Health check endpoint for monitoring and load balancers."""
-    return JsonResponse({
-        'status': 'healthy',
-        'service': 'ALX Travel App API',
-    })
-
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="ALX Travel App API",
-        default_version='v1',
-        description="API documentation for the ALX Travel App",
-        contact=openapi.Contact(email="support@alxtravel.com"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+
+from .health import liveness, readiness
+
+
+@lru_cache(maxsize=None)
+def _swagger_ui_view():
+    """Build the drf-yasg Swagger UI view on first use rather than at import time."""
+    from rest_framework import permissions
+    from drf_yasg.views import get_schema_view
+    from drf_yasg import openapi
+
+    schema_view = get_schema_view(
+        openapi.Info(
+            title="ALX Travel App API",
+            default_version='v1',
+            description="API documentation for the ALX Travel App",
+            contact=openapi.Contact(email="support@alxtravel.com"),
+        ),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+    )
+    return schema_view.with_ui('swagger', cache_timeout=0)
+
+
+def swagger_ui(request, *args, **kwargs):
+    return _swagger_ui_view()(request, *args, **kwargs)
+
 
 urlpatterns = [
     path('', RedirectView.as_view(url='api/', permanent=False), name='home-redirect'),
-    path('health/', health_check, name='health-check'),
+    # Normally answered by HealthCheckMiddleware before URL resolution.
+    path('health/', liveness, name='health-check'),
+    path('ready/', readiness, name='readiness-check'),
     path('admin/', admin.site.urls),
     path('api/', include('listings.urls')),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
 ]
+
+if settings.ENABLE_API_DOCS:
+    urlpatterns.append(path('swagger/', swagger_ui, name='schema-swagger-ui'))
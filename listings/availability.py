@@ -0,0 +1,97 @@
+"""Maintenance and reads of the per-listing availability calendar.
+
+Each `ListingAvailabilityMonth` row stores a month of nights as a bitmap.
+New bookings OR their nights into the affected rows; changed or deleted
+bookings recompute only the months they touched, since a cleared night may
+still be covered by another booking.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Listing, Booking, ListingAvailabilityMonth
+from .stats import month_start, next_month
+
+
+def night_masks(check_in, check_out):
+    """Return {month_start: bitmask} for the nights [check_in, check_out)."""
+    masks = defaultdict(int)
+    current = check_in
+    while current < check_out:
+        masks[month_start(current)] |= 1 << (current.day - 1)
+        current += timedelta(days=1)
+    return dict(masks)
+
+
+def mark_booked(listing_id, check_in, check_out):
+    """Set the nights of a new booking without re-reading other bookings.
+
+    A month row that doesn't exist yet is computed from all of the month's
+    bookings instead, so it never starts out holding only this booking.
+    """
+    if not Listing.objects.filter(pk=listing_id).exists():
+        return
+    for month, mask in night_masks(check_in, check_out).items():
+        _, created = ListingAvailabilityMonth.objects.get_or_create(listing_id=listing_id, month=month)
+        if created:
+            refresh_months(listing_id, {month})
+            continue
+        ListingAvailabilityMonth.objects.filter(listing_id=listing_id, month=month).update(
+            booked_mask=F('booked_mask').bitor(mask),
+        )
+
+
+def refresh_months(listing_id, months):
+    """Recompute the bitmap for the given months from the listing's bookings."""
+    if not Listing.objects.filter(pk=listing_id).exists():
+        return
+    for month in sorted(months):
+        end = next_month(month)
+        mask = 0
+        bookings = Booking.objects.filter(
+            listing_id=listing_id, check_in__lt=end, check_out__gt=month,
+        ).values_list('check_in', 'check_out')
+        for check_in, check_out in bookings:
+            mask |= night_masks(max(check_in, month), min(check_out, end)).get(month, 0)
+        ListingAvailabilityMonth.objects.update_or_create(
+            listing_id=listing_id, month=month, defaults={'booked_mask': mask},
+        )
+
+
+def rebuild_calendar_for_listings(listing_ids):
+    """Recompute all calendar rows for the given listings; returns rows written."""
+    listing_ids = list(listing_ids)
+    masks = defaultdict(int)
+    bookings = Booking.objects.filter(listing_id__in=listing_ids).values_list(
+        'listing_id', 'check_in', 'check_out',
+    )
+    for listing_id, check_in, check_out in bookings.iterator():
+        for month, mask in night_masks(check_in, check_out).items():
+            masks[(listing_id, month)] |= mask
+
+    rows = [
+        ListingAvailabilityMonth(listing_id=listing_id, month=month, booked_mask=mask)
+        for (listing_id, month), mask in masks.items()
+    ]
+    with transaction.atomic():
+        ListingAvailabilityMonth.objects.filter(listing_id__in=listing_ids).delete()
+        ListingAvailabilityMonth.objects.bulk_create(rows)
+    return len(rows)
+
+
+def availability_for_range(listing_id, start, end):
+    """Return [(date, available)] for the nights [start, end) in one query."""
+    rows = ListingAvailabilityMonth.objects.filter(
+        listing_id=listing_id, month__gte=month_start(start), month__lt=end,
+    ).values_list('month', 'booked_mask')
+    masks = dict(rows)
+
+    nights = []
+    current = start
+    while current < end:
+        mask = masks.get(month_start(current), 0)
+        nights.append((current, not mask & (1 << (current.day - 1))))
+        current += timedelta(days=1)
+    return nights
@@ -0,0 +1,120 @@
+"""Idempotency-Key support for unsafe API endpoints.
+
+Clients send an `Idempotency-Key` header on `POST` requests they may retry.
+The first request with a given key runs normally and its response is stored
+in the cache together with a fingerprint of the request; repeats with the
+same key replay the stored response instead of creating duplicate rows (or a
+second Chapa transaction). A concurrent duplicate waits briefly on a cache
+lock held by the in-flight request rather than racing it.
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _caller(request):
+    """Identify the caller so one client's key can't replay another's response."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return 'anonymous'
+
+
+def _cache_key(request, key):
+    scope = f"{_caller(request)}:{request.method}:{request.path}:{key}"
+    return 'idempotency:' + hashlib.sha256(scope.encode()).hexdigest()
+
+
+def _fingerprint(request):
+    # Hash the parsed payload: the raw body stream may already be consumed
+    # (e.g. by CSRF checks under session authentication).
+    data = request.data
+    if hasattr(data, 'lists'):
+        data = dict(data.lists())
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(json.dumps(data, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _replay(stored, fingerprint):
+    if stored['fingerprint'] != fingerprint:
+        return Response(
+            {'detail': 'Idempotency-Key was already used with a different request payload.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(stored['data'], status=stored['status'], headers={REPLAYED_HEADER: 'true'})
+
+
+def idempotent(view_method):
+    """Make a viewset method replay its response for repeated Idempotency-Keys.
+
+    Requests without the header are passed through unchanged. Only responses
+    below 500 are stored, so a request that failed server-side can be retried
+    with the same key.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'detail': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        cache_key = _cache_key(request, key)
+        lock_key = f"{cache_key}:lock"
+        fingerprint = _fingerprint(request)
+
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        lock_timeout = _setting('IDEMPOTENCY_LOCK_TIMEOUT', 30)
+        if not cache.add(lock_key, fingerprint, timeout=lock_timeout):
+            # Another request with this key is in flight; wait for its result.
+            deadline = time.monotonic() + _setting('IDEMPOTENCY_WAIT_TIMEOUT', 5)
+            while time.monotonic() < deadline:
+                time.sleep(0.1)
+                stored = cache.get(cache_key)
+                if stored is not None:
+                    return _replay(stored, fingerprint)
+            return Response(
+                {'detail': 'A request with this Idempotency-Key is still being processed.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code < 500 and hasattr(response, 'data'):
+                cache.set(
+                    cache_key,
+                    {
+                        'fingerprint': fingerprint,
+                        'status': response.status_code,
+                        'data': response.data,
+                    },
+                    timeout=_setting('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60),
+                )
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    return wrapper
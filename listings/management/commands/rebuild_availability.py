@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from listings.models import Listing
+from listings.availability import rebuild_calendar_for_listings
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-night availability calendar from bookings."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listing', type=int, action='append', dest='listing_ids',
+                            help="Only rebuild this listing id (may be repeated).")
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help="Number of listings rebuilt per transaction.")
+
+    def handle(self, *args, **options):
+        listing_ids = options['listing_ids'] or list(
+            Listing.objects.order_by('id').values_list('id', flat=True)
+        )
+        chunk_size = options['chunk_size']
+
+        rows = 0
+        for start in range(0, len(listing_ids), chunk_size):
+            rows += rebuild_calendar_for_listings(listing_ids[start:start + chunk_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Rebuilt {rows} calendar months for {len(listing_ids)} listings."
+        ))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from listings.models import Listing, Booking, Review
+from listings.pricing import quote_stay
 from django.utils import timezone
 import random
 from datetime import timedelta, date
@@ -32,7 +33,7 @@ class Command(BaseCommand):
             for i in range(2):
                 check_in = date.today() + timedelta(days=random.randint(1, 10))
                 check_out = check_in + timedelta(days=random.randint(2, 5))
-                total_price = (check_out - check_in).days * float(listing.price_per_night)
+                total_price = quote_stay(listing.id, check_in, check_out)
                 Booking.objects.create(
                     listing=listing,
                     customer_name=f"Customer {i+1}",
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Code run in a fresh interpreter to mirror what each process imports at boot.
+STARTUP_SCRIPTS = {
+    'web': (
+        "import django; django.setup(); "
+        "from django.core.wsgi import get_wsgi_application; get_wsgi_application(); "
+        "from django.urls import get_resolver; get_resolver().url_patterns"
+    ),
+    'worker': (
+        "import django; django.setup(); "
+        "from alx_travel_app.celery import app; app.loader.import_default_modules()"
+    ),
+}
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into (module, self_us, cumulative_us) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Report module import cost for web or worker startup using `python -X importtime`."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(STARTUP_SCRIPTS), default='web',
+                            help="Which process startup to profile.")
+        parser.add_argument('--top', type=int, default=25,
+                            help="Number of modules to list.")
+        parser.add_argument('--sort', choices=['cumulative', 'self'], default='cumulative',
+                            help="Rank modules by cumulative or self import time.")
+
+    def handle(self, *args, **options):
+        env = os.environ.copy()
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'alx_travel_app.settings')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPTS[options['target']]],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+
+        rows = parse_importtime(result.stderr)
+        total_us = sum(self_us for _, self_us, _ in rows)
+        key = 2 if options['sort'] == 'cumulative' else 1
+        rows.sort(key=lambda row: row[key], reverse=True)
+
+        self.stdout.write(self.style.NOTICE(
+            f"{options['target']} startup: {len(rows)} modules, {total_us / 1000:.1f} ms total import time"
+        ))
+        self.stdout.write(f"{'self ms':>9} {'cumul ms':>9}  module")
+        for module, self_us, cumulative_us in rows[:options['top']]:
+            self.stdout.write(f"{self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f}  {module}")
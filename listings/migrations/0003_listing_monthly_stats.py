@@ -0,0 +1,96 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:34
+
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_stats(apps, schema_editor):
+    Booking = apps.get_model('listings', 'Booking')
+    Payment = apps.get_model('listings', 'Payment')
+    ListingMonthlyStats = apps.get_model('listings', 'ListingMonthlyStats')
+    buckets = defaultdict(lambda: {
+        'bookings_count': 0,
+        'nights_booked': 0,
+        'booked_revenue': Decimal('0'),
+        'paid_revenue': Decimal('0'),
+    })
+
+    bookings = Booking.objects.values_list('listing_id', 'check_in', 'check_out', 'total_price')
+    for listing_id, check_in, check_out, total_price in bookings.iterator():
+        current = check_in
+        while current < check_out:
+            buckets[(listing_id, current.replace(day=1))]['nights_booked'] += 1
+            current += timedelta(days=1)
+        bucket = buckets[(listing_id, check_in.replace(day=1))]
+        bucket['bookings_count'] += 1
+        bucket['booked_revenue'] += total_price
+
+    payments = Payment.objects.filter(status='Completed').values_list(
+        'booking__listing_id', 'booking__check_in', 'amount',
+    )
+    for listing_id, check_in, amount in payments.iterator():
+        bucket = buckets.get((listing_id, check_in.replace(day=1)))
+        if bucket is not None:
+            bucket['paid_revenue'] += amount
+
+    ListingMonthlyStats.objects.bulk_create(
+        [
+            ListingMonthlyStats(
+                listing_id=listing_id,
+                month=month,
+                nights_in_month=calendar.monthrange(month.year, month.month)[1],
+                **values,
+            )
+            for (listing_id, month), values in buckets.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0002_payment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingMonthlyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the calendar month.')),
+                ('bookings_count', models.PositiveIntegerField(default=0)),
+                ('nights_booked', models.PositiveIntegerField(default=0)),
+                ('nights_in_month', models.PositiveIntegerField(default=0)),
+                ('booked_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('paid_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['listing', 'month'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['listing', 'check_in'], name='booking_listing_checkin_idx'),
+        ),
+        migrations.AddField(
+            model_name='listingmonthlystats',
+            name='listing',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_stats', to='listings.listing'),
+        ),
+        migrations.AddIndex(
+            model_name='listingmonthlystats',
+            index=models.Index(fields=['month'], name='listing_stats_month_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='listingmonthlystats',
+            constraint=models.UniqueConstraint(fields=('listing', 'month'), name='unique_listing_month_stats'),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:35
+
+from collections import defaultdict
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_calendar(apps, schema_editor):
+    Booking = apps.get_model('listings', 'Booking')
+    ListingAvailabilityMonth = apps.get_model('listings', 'ListingAvailabilityMonth')
+    masks = defaultdict(int)
+    bookings = Booking.objects.values_list('listing_id', 'check_in', 'check_out')
+    for listing_id, check_in, check_out in bookings.iterator():
+        current = check_in
+        while current < check_out:
+            masks[(listing_id, current.replace(day=1))] |= 1 << (current.day - 1)
+            current += timedelta(days=1)
+    ListingAvailabilityMonth.objects.bulk_create(
+        [
+            ListingAvailabilityMonth(listing_id=listing_id, month=month, booked_mask=mask)
+            for (listing_id, month), mask in masks.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0003_listing_monthly_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingAvailabilityMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the calendar month.')),
+                ('booked_mask', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability_months', to='listings.listing')),
+            ],
+            options={
+                'ordering': ['listing', 'month'],
+                'constraints': [models.UniqueConstraint(fields=('listing', 'month'), name='unique_listing_availability_month')],
+            },
+        ),
+        migrations.RunPython(backfill_calendar, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:39
+
+from django.db import migrations, models
+from django.db.models import Min, OuterRef, Subquery
+
+
+def backfill_paid_at(apps, schema_editor):
+    Booking = apps.get_model('listings', 'Booking')
+    Payment = apps.get_model('listings', 'Payment')
+    first_completed = Payment.objects.filter(
+        booking=OuterRef('pk'), status='Completed',
+    ).values('booking').annotate(first=Min('created_at')).values('first')
+    Booking.objects.filter(payments__status='Completed').update(paid_at=Subquery(first_completed))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0005_outbox_message'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='paid_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='status',
+            field=models.CharField(choices=[('Pending', 'Pending'), ('Completed', 'Completed'), ('Failed', 'Failed')], db_index=True, default='Pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['booking', 'status'], name='payment_booking_status_idx'),
+        ),
+        migrations.RunPython(backfill_paid_at, migrations.RunPython.noop),
+    ]
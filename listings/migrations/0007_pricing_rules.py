@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0006_payment_status_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LengthOfStayDiscount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('min_nights', models.PositiveIntegerField()),
+                ('percent_off', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('listing', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stay_discounts', to='listings.listing')),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(('percent_off__gte', 0), ('percent_off__lte', 100)), name='discount_percent_range')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ListingRateOverride',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('price_per_night', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rate_overrides', to='listings.listing')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('listing', 'date'), name='unique_listing_rate_date')],
+            },
+        ),
+    ]
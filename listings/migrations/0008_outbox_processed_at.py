@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0007_pricing_rules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+def reset_failed_payments(apps, schema_editor):
+    # Before Failed became terminal, any non-"success" Chapa status (including
+    # "pending") was stored as Failed. Put those rows back to Pending so the
+    # next verify asks Chapa again; genuinely failed payments are re-marked
+    # Failed from Chapa's explicit answer.
+    Payment = apps.get_model('listings', 'Payment')
+    Payment.objects.filter(status='Failed').update(status='Pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0008_outbox_processed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(reset_failed_payments, migrations.RunPython.noop),
+    ]
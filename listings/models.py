@@ -22,6 +22,17 @@ class Booking(models.Model):
     check_out = models.DateField()
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     booked_at = models.DateTimeField(default=timezone.now)
+    # Denormalized from Payment so "is this booking paid?" never scans payments.
+    paid_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['listing', 'check_in'], name='booking_listing_checkin_idx'),
+        ]
+
+    @property
+    def is_paid(self):
+        return self.paid_at is not None
 
     def __str__(self):
         return f"Booking for {self.customer_name} - {self.listing.title}"
@@ -47,6 +58,14 @@ class Review(models.Model):
 
 
 class Payment(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'Pending', 'Pending'
+        COMPLETED = 'Completed', 'Completed'
+        FAILED = 'Failed', 'Failed'
+
+    # Payments in these states are final and never re-verified with Chapa.
+    TERMINAL_STATUSES = (Status.COMPLETED, Status.FAILED)
+
     booking = models.ForeignKey(Booking, related_name='payments', on_delete=models.CASCADE)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     email = models.EmailField()
@@ -54,8 +73,150 @@ class Payment(models.Model):
     last_name = models.CharField(max_length=200)
     tx_ref = models.CharField(max_length=255, unique=True)
     chapa_transaction_id = models.CharField(max_length=255, blank=True, null=True)
-    status = models.CharField(max_length=20, default='Pending')
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['booking', 'status'], name='payment_booking_status_idx'),
+        ]
+
+    @property
+    def is_final(self):
+        return self.status in self.TERMINAL_STATUSES
+
+    def __str__(self):
+        return f"Payment {self.tx_ref}"
+
+
+class ListingRateOverride(models.Model):
+    """Nightly price for one listing on one date, replacing `price_per_night`."""
+    listing = models.ForeignKey(Listing, related_name='rate_overrides', on_delete=models.CASCADE)
+    date = models.DateField()
+    price_per_night = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['listing', 'date'], name='unique_listing_rate_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.listing_id} @ {self.date}: {self.price_per_night}"
+
+
+class LengthOfStayDiscount(models.Model):
+    """Percentage off stays of at least `min_nights`.
+
+    Discounts without a listing apply to every listing that has none of its own.
+    """
+    listing = models.ForeignKey(
+        Listing, related_name='stay_discounts', on_delete=models.CASCADE, blank=True, null=True,
+    )
+    min_nights = models.PositiveIntegerField()
+    percent_off = models.DecimalField(max_digits=5, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(percent_off__gte=0) & models.Q(percent_off__lte=100),
+                name='discount_percent_range'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.percent_off}% off {self.min_nights}+ nights"
+
+
+class ListingMonthlyStats(models.Model):
+    """Precomputed occupancy and revenue for one listing in one calendar month.
+
+    Rows are maintained incrementally from Booking and Payment writes (see
+    `listings.stats`) and repaired nightly by `rebuild_listing_stats`.
+    Nights are split across the months they fall in; booking counts and
+    revenue are attributed to the check-in month.
+    """
+    listing = models.ForeignKey(Listing, related_name='monthly_stats', on_delete=models.CASCADE)
+    month = models.DateField(help_text="First day of the calendar month.")
+    bookings_count = models.PositiveIntegerField(default=0)
+    nights_booked = models.PositiveIntegerField(default=0)
+    nights_in_month = models.PositiveIntegerField(default=0)
+    booked_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    paid_revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['listing', 'month'], name='unique_listing_month_stats'),
+        ]
+        indexes = [
+            models.Index(fields=['month'], name='listing_stats_month_idx'),
+        ]
+        ordering = ['listing', 'month']
+
+    @property
+    def occupancy_rate(self):
+        if not self.nights_in_month:
+            return 0.0
+        return round(self.nights_booked / self.nights_in_month, 4)
+
+    def __str__(self):
+        return f"Stats for listing {self.listing_id} - {self.month:%Y-%m}"
+
+
+class ListingAvailabilityMonth(models.Model):
+    """Per-night booked bitmap for one listing in one calendar month.
+
+    Bit ``n`` of `booked_mask` is set when night ``day n + 1`` is booked, so a
+    month-view calendar is a single indexed row read. Maintained from Booking
+    writes by `listings.availability`; rebuild with `manage.py rebuild_availability`.
+    """
+    listing = models.ForeignKey(Listing, related_name='availability_months', on_delete=models.CASCADE)
+    month = models.DateField(help_text="First day of the calendar month.")
+    booked_mask = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['listing', 'month'], name='unique_listing_availability_month'),
+        ]
+        ordering = ['listing', 'month']
+
+    def is_booked(self, day):
+        return bool(self.booked_mask & (1 << (day.day - 1)))
+
+    def __str__(self):
+        return f"Availability for listing {self.listing_id} - {self.month:%Y-%m}"
+
+
+class OutboxMessage(models.Model):
+    """A Celery task recorded in the same transaction as the write that caused it.
+
+    `listings.outbox.dispatch_pending` drains pending rows to the broker in
+    batches, so requests never block on the broker and nothing is lost when
+    it is unavailable.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        DISPATCHED = 'dispatched', 'Dispatched'
+        FAILED = 'failed', 'Failed'
+
+    task_name = models.CharField(max_length=255)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    dedup_key = models.CharField(max_length=255, unique=True, blank=True, null=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(blank=True, null=True)
+    # Set by the consuming task once it has run, so a re-published task is skipped.
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+
     def __str__(self):
-        return f"Payment {self.tx_ref}"
\ No newline at end of file
+        return f"Outbox {self.task_name} ({self.status})"
@@ -0,0 +1,134 @@
+"""Transactional outbox for Celery tasks.
+
+Call `enqueue_task` inside the transaction that writes the data the task
+needs; the row commits (or rolls back) with it. The `dispatch_outbox` beat
+task calls `dispatch_pending` to publish due rows to the broker in batches,
+retrying failures with exponential backoff.
+"""
+import logging
+from datetime import timedelta
+
+from celery import current_app
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_task(task_name, args=(), kwargs=None, dedup_key=None):
+    """Record a task for dispatch; a repeated `dedup_key` returns the existing row."""
+    if dedup_key:
+        message, _ = OutboxMessage.objects.get_or_create(
+            dedup_key=dedup_key,
+            defaults={'task_name': task_name, 'args': list(args), 'kwargs': kwargs or {}},
+        )
+        return message
+    return OutboxMessage.objects.create(task_name=task_name, args=list(args), kwargs=kwargs or {})
+
+
+def _backoff(attempts):
+    base = getattr(settings, 'OUTBOX_BACKOFF_BASE', 30)
+    ceiling = getattr(settings, 'OUTBOX_BACKOFF_MAX', 60 * 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), ceiling))
+
+
+def _claim_batch(batch_size):
+    """Lease up to `batch_size` due rows and commit the lease before publishing.
+
+    Rows are locked with SKIP LOCKED only while their `next_attempt_at` is
+    pushed past the lease, so concurrent dispatchers never pick the same row
+    and no DB transaction stays open across broker round trips. Rows from a
+    dispatcher that dies mid-batch become due again when the lease expires.
+    """
+    lease = timedelta(seconds=getattr(settings, 'OUTBOX_CLAIM_TIMEOUT', 60))
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxMessage.Status.PENDING, next_attempt_at__lte=timezone.now())
+            .order_by('id')[:batch_size]
+        )
+        OutboxMessage.objects.filter(pk__in=[message.pk for message in messages]).update(
+            next_attempt_at=timezone.now() + lease,
+        )
+    return messages
+
+
+def dispatch_pending(batch_size=None):
+    """Publish one batch of due outbox rows; returns (dispatched, failed).
+
+    Each message is published with task id `outbox-<id>`; tasks use
+    `already_processed`/`mark_processed` with that id to skip a re-publish
+    (e.g. after a crash between publishing and recording the dispatch). The
+    batch stops at the first broker error so an outage costs one timeout
+    rather than one per row; the unattempted rest is released immediately.
+    """
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+    max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 8)
+    messages = _claim_batch(batch_size)
+    dispatched = []
+    failed = 0
+
+    for index, message in enumerate(messages):
+        try:
+            current_app.send_task(
+                message.task_name,
+                args=message.args,
+                kwargs=message.kwargs,
+                task_id=f"outbox-{message.id}",
+            )
+        except Exception as exc:
+            message.attempts += 1
+            message.last_error = str(exc)
+            if message.attempts >= max_attempts:
+                message.status = OutboxMessage.Status.FAILED
+            else:
+                message.next_attempt_at = timezone.now() + _backoff(message.attempts)
+            message.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+            logger.error(f"Outbox dispatch of {message.task_name} ({message.id}) failed: {exc}")
+            failed += 1
+            OutboxMessage.objects.filter(
+                pk__in=[remaining.pk for remaining in messages[index + 1:]],
+            ).update(next_attempt_at=timezone.now())
+            break
+
+        message.status = OutboxMessage.Status.DISPATCHED
+        message.dispatched_at = timezone.now()
+        message.attempts += 1
+        dispatched.append(message)
+
+    OutboxMessage.objects.bulk_update(dispatched, ['status', 'dispatched_at', 'attempts'])
+    return len(dispatched), failed
+
+
+def _outbox_id(task_id):
+    if task_id and task_id.startswith('outbox-'):
+        return int(task_id[len('outbox-'):])
+    return None
+
+
+def already_processed(task_id):
+    """True if the outbox message behind this Celery task id already ran."""
+    outbox_id = _outbox_id(task_id)
+    if outbox_id is None:
+        return False
+    return OutboxMessage.objects.filter(pk=outbox_id, processed_at__isnull=False).exists()
+
+
+def mark_processed(task_id):
+    """Record that the outbox message behind this Celery task id has run."""
+    outbox_id = _outbox_id(task_id)
+    if outbox_id is not None:
+        OutboxMessage.objects.filter(pk=outbox_id, processed_at__isnull=True).update(
+            processed_at=timezone.now(),
+        )
+
+
+def purge_dispatched(older_than):
+    """Delete rows dispatched before `older_than`; returns the number removed."""
+    deleted, _ = OutboxMessage.objects.filter(
+        status=OutboxMessage.Status.DISPATCHED, dispatched_at__lt=older_than,
+    ).delete()
+    return deleted
@@ -0,0 +1,109 @@
+"""Decimal-exact price quotes for many stays at once.
+
+`quote_stays` loads every listing, rate override and length-of-stay discount
+it needs with one query each, then prices each stay without touching the
+database again. Nights default to `Listing.price_per_night`; a
+`ListingRateOverride` replaces the price for its date, and the best
+`LengthOfStayDiscount` for the stay length is applied to the subtotal.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db.models import Q
+
+from .models import Listing, ListingRateOverride, LengthOfStayDiscount
+
+CENT = Decimal('0.01')
+HUNDRED = Decimal('100')
+
+
+def _load_overrides(listing_ids, start, end):
+    """Return {listing_id: (sorted dates, price deltas, prefix sums of deltas)}."""
+    rows = ListingRateOverride.objects.filter(
+        listing_id__in=listing_ids, date__gte=start, date__lt=end,
+    ).order_by('listing_id', 'date').values_list('listing_id', 'date', 'price_per_night',
+                                                 'listing__price_per_night')
+    overrides = defaultdict(lambda: ([], [Decimal('0')]))
+    for listing_id, day, price, base_price in rows:
+        dates, prefix = overrides[listing_id]
+        dates.append(day)
+        prefix.append(prefix[-1] + price - base_price)
+    return overrides
+
+
+def _load_discounts(listing_ids):
+    """Return ({listing_id: [(min_nights, percent)]}, [global (min_nights, percent)]),
+    each list ordered by descending `min_nights`."""
+    per_listing = defaultdict(list)
+    global_discounts = []
+    rows = LengthOfStayDiscount.objects.filter(
+        Q(listing_id__in=listing_ids) | Q(listing__isnull=True),
+    ).order_by('-min_nights').values_list('listing_id', 'min_nights', 'percent_off')
+    for listing_id, min_nights, percent_off in rows:
+        target = global_discounts if listing_id is None else per_listing[listing_id]
+        target.append((min_nights, percent_off))
+    return per_listing, global_discounts
+
+
+def _best_discount(discounts, nights):
+    for min_nights, percent_off in discounts:
+        if nights >= min_nights:
+            return percent_off
+    return Decimal('0')
+
+
+def quote_stays(stays):
+    """Price a list of `(listing_id, check_in, check_out)` stays.
+
+    Returns one dict per stay, in input order. Stays for unknown listings or
+    with `check_out <= check_in` get an `error` entry instead of prices.
+    """
+    stays = list(stays)
+    valid = [stay for stay in stays if stay[2] > stay[1]]
+    listing_ids = {listing_id for listing_id, _, _ in valid}
+
+    listings = Listing.objects.only('id', 'price_per_night', 'available').in_bulk(listing_ids)
+    overrides = {}
+    per_listing_discounts, global_discounts = {}, []
+    if valid:
+        start = min(check_in for _, check_in, _ in valid)
+        end = max(check_out for _, _, check_out in valid)
+        overrides = _load_overrides(listings.keys(), start, end)
+        per_listing_discounts, global_discounts = _load_discounts(listings.keys())
+
+    quotes = []
+    for listing_id, check_in, check_out in stays:
+        quote = {'listing': listing_id, 'check_in': check_in, 'check_out': check_out}
+        listing = listings.get(listing_id)
+        if check_out <= check_in:
+            quote['error'] = 'check_out must be after check_in.'
+        elif listing is None:
+            quote['error'] = 'Listing not found.'
+        else:
+            nights = (check_out - check_in).days
+            subtotal = listing.price_per_night * nights
+            if listing_id in overrides:
+                dates, prefix = overrides[listing_id]
+                subtotal += prefix[bisect_left(dates, check_out)] - prefix[bisect_left(dates, check_in)]
+
+            percent_off = _best_discount(
+                per_listing_discounts.get(listing_id) or global_discounts, nights,
+            )
+            discount = (subtotal * percent_off / HUNDRED).quantize(CENT, rounding=ROUND_HALF_UP)
+            quote.update(
+                available=listing.available,
+                nights=nights,
+                subtotal=subtotal.quantize(CENT),
+                discount_percent=percent_off,
+                discount=discount,
+                total=(subtotal - discount).quantize(CENT),
+            )
+        quotes.append(quote)
+    return quotes
+
+
+def quote_stay(listing_id, check_in, check_out):
+    """Total price for a single stay, or None when it cannot be quoted."""
+    quote = quote_stays([(listing_id, check_in, check_out)])[0]
+    return quote.get('total')
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Listing, Booking, Review
+from .models import Listing, Booking, Review, ListingMonthlyStats
+from .pricing import quote_stay
 
 class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
@@ -9,13 +10,35 @@ class ReviewSerializer(serializers.ModelSerializer):
 
 class BookingSerializer(serializers.ModelSerializer):
     listing_title = serializers.CharField(source='listing.title', read_only=True)
+    is_paid = serializers.BooleanField(read_only=True)
+    total_price = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
 
     class Meta:
         model = Booking
         fields = [
             'id', 'listing', 'listing_title', 'customer_name', 'customer_email',
-            'check_in', 'check_out', 'total_price', 'booked_at'
+            'check_in', 'check_out', 'total_price', 'booked_at', 'is_paid', 'paid_at'
         ]
+        read_only_fields = ['paid_at']
+
+    def validate(self, attrs):
+        # The total is always priced server-side; a client-sent total_price is ignored.
+        # Updates that leave the stay unchanged keep the price the guest booked at.
+        stay_fields = ('listing', 'check_in', 'check_out')
+        if self.instance is not None and all(
+            attrs.get(field, getattr(self.instance, field)) == getattr(self.instance, field)
+            for field in stay_fields
+        ):
+            return attrs
+
+        listing = attrs.get('listing', getattr(self.instance, 'listing', None))
+        check_in = attrs.get('check_in', getattr(self.instance, 'check_in', None))
+        check_out = attrs.get('check_out', getattr(self.instance, 'check_out', None))
+        total = quote_stay(listing.id, check_in, check_out)
+        if total is None:
+            raise serializers.ValidationError({'check_out': 'check_out must be after check_in.'})
+        attrs['total_price'] = total
+        return attrs
 
 
 class ListingSerializer(serializers.ModelSerializer):
@@ -28,3 +51,25 @@ class ListingSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'location', 'price_per_night',
             'available', 'created_at', 'updated_at', 'bookings', 'reviews'
         ]
+
+
+class ListingMonthlyStatsSerializer(serializers.ModelSerializer):
+    month = serializers.DateField(format='%Y-%m')
+    occupancy_rate = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ListingMonthlyStats
+        fields = [
+            'listing', 'month', 'bookings_count', 'nights_booked', 'nights_in_month',
+            'occupancy_rate', 'booked_revenue', 'paid_revenue', 'updated_at'
+        ]
+
+
+class StayQuoteSerializer(serializers.Serializer):
+    listing = serializers.IntegerField()
+    check_in = serializers.DateField()
+    check_out = serializers.DateField()
+
+
+class QuoteRequestSerializer(serializers.Serializer):
+    stays = StayQuoteSerializer(many=True, allow_empty=False, max_length=500)
@@ -0,0 +1,103 @@
+"""Signal handlers that keep derived listing data in step with bookings and payments.
+
+Refreshes run after commit with `robust=True`: a failing refresh is logged
+instead of turning an already-committed write into a 500 (which a retry with
+the same Idempotency-Key would then repeat). The nightly stats rebuild and
+`rebuild_availability` repair any drift this leaves behind.
+"""
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Booking, Payment
+from . import availability, stats
+
+
+def _booking_key(booking):
+    return booking.listing_id, booking.check_in, booking.check_out
+
+
+def _schedule_stats_refresh(keys):
+    """Refresh the rollup buckets touched by the given booking keys after commit."""
+    months_by_listing = {}
+    for listing_id, check_in, check_out in keys:
+        months_by_listing.setdefault(listing_id, set()).update(
+            stats.affected_months(check_in, check_out)
+        )
+
+    def refresh():
+        for listing_id, months in months_by_listing.items():
+            stats.refresh_listing_months(listing_id, months)
+
+    transaction.on_commit(refresh, robust=True)
+
+
+def _schedule_calendar_update(key, created, previous_key=None):
+    """Mark new bookings incrementally; recompute months for changed ones."""
+    listing_id, check_in, check_out = key
+
+    def update():
+        if created:
+            availability.mark_booked(listing_id, check_in, check_out)
+            return
+        months_by_listing = {listing_id: set(availability.night_masks(check_in, check_out))}
+        if previous_key:
+            previous_listing_id, previous_in, previous_out = previous_key
+            months_by_listing.setdefault(previous_listing_id, set()).update(
+                availability.night_masks(previous_in, previous_out)
+            )
+        for changed_listing_id, months in months_by_listing.items():
+            availability.refresh_months(changed_listing_id, months)
+
+    transaction.on_commit(update, robust=True)
+
+
+@receiver(pre_save, sender=Booking)
+def remember_previous_booking(sender, instance, **kwargs):
+    """Stash the stored dates so moved bookings also refresh their old months."""
+    instance._previous_key = None
+    if instance.pk:
+        previous = Booking.objects.filter(pk=instance.pk).values_list(
+            'listing_id', 'check_in', 'check_out',
+        ).first()
+        instance._previous_key = previous
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    previous_key = getattr(instance, '_previous_key', None)
+    keys = {_booking_key(instance)}
+    if previous_key:
+        keys.add(previous_key)
+    _schedule_stats_refresh(keys)
+    if created or previous_key != _booking_key(instance):
+        _schedule_calendar_update(_booking_key(instance), created, previous_key)
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    _schedule_stats_refresh({_booking_key(instance)})
+    _schedule_calendar_update(_booking_key(instance), created=False)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def payment_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    booking = Booking.objects.filter(pk=instance.booking_id).only(
+        'listing_id', 'check_in', 'check_out',
+    ).first()
+    if booking is not None:
+        _schedule_stats_refresh({_booking_key(booking)})
+
+
+@receiver(post_save, sender=Payment)
+def mark_booking_paid(sender, instance, raw=False, **kwargs):
+    """Stamp `Booking.paid_at` the first time one of its payments completes."""
+    if raw or instance.status != Payment.Status.COMPLETED:
+        return
+    Booking.objects.filter(pk=instance.booking_id, paid_at__isnull=True).update(paid_at=timezone.now())
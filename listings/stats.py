@@ -0,0 +1,151 @@
+"""Maintenance of the `ListingMonthlyStats` rollup table.
+
+Booking and Payment writes refresh only the (listing, month) buckets they
+touch; `rebuild_stats_for_listings` recomputes every bucket for a chunk of
+listings and is used by the nightly repair task.
+"""
+import calendar
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import Listing, Booking, Payment, ListingMonthlyStats
+
+PAID_STATUS = Payment.Status.COMPLETED
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def days_in_month(month):
+    return calendar.monthrange(month.year, month.month)[1]
+
+
+def nights_by_month(check_in, check_out):
+    """Split the nights [check_in, check_out) into {month_start: nights}."""
+    nights = {}
+    current = check_in
+    while current < check_out:
+        month = month_start(current)
+        boundary = min(next_month(month), check_out)
+        nights[month] = (boundary - current).days
+        current = boundary
+    return nights
+
+
+def affected_months(check_in, check_out):
+    """Months whose rollup depends on a booking with these dates."""
+    months = set(nights_by_month(check_in, check_out))
+    months.add(month_start(check_in))
+    return months
+
+
+def refresh_listing_month(listing_id, month):
+    """Recompute a single (listing, month) bucket from the source tables."""
+    if not Listing.objects.filter(pk=listing_id).exists():
+        return None
+
+    end = next_month(month)
+    bookings = Booking.objects.filter(
+        listing_id=listing_id, check_in__lt=end, check_out__gt=month,
+    ).only('check_in', 'check_out', 'total_price')
+
+    bookings_count = 0
+    nights_booked = 0
+    booked_revenue = Decimal('0')
+    for booking in bookings:
+        nights_booked += nights_by_month(booking.check_in, booking.check_out).get(month, 0)
+        if month <= booking.check_in < end:
+            bookings_count += 1
+            booked_revenue += booking.total_price
+
+    if not bookings_count and not nights_booked:
+        ListingMonthlyStats.objects.filter(listing_id=listing_id, month=month).delete()
+        return None
+
+    paid_revenue = Payment.objects.filter(
+        booking__listing_id=listing_id,
+        booking__check_in__gte=month,
+        booking__check_in__lt=end,
+        status=PAID_STATUS,
+    ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
+
+    stats, _ = ListingMonthlyStats.objects.update_or_create(
+        listing_id=listing_id,
+        month=month,
+        defaults={
+            'bookings_count': bookings_count,
+            'nights_booked': nights_booked,
+            'nights_in_month': days_in_month(month),
+            'booked_revenue': booked_revenue,
+            'paid_revenue': paid_revenue,
+        },
+    )
+    return stats
+
+
+def refresh_listing_months(listing_id, months):
+    for month in sorted(months):
+        refresh_listing_month(listing_id, month)
+
+
+def rebuild_stats_for_listings(listing_ids):
+    """Recompute all rollup rows for the given listings in one pass.
+
+    Reads the chunk's bookings and completed payments with one query each and
+    replaces the chunk's rollup rows inside a single transaction. Returns the
+    number of rows written.
+    """
+    listing_ids = list(listing_ids)
+    buckets = defaultdict(lambda: {
+        'bookings_count': 0,
+        'nights_booked': 0,
+        'booked_revenue': Decimal('0'),
+        'paid_revenue': Decimal('0'),
+    })
+
+    bookings = Booking.objects.filter(listing_id__in=listing_ids).values_list(
+        'listing_id', 'check_in', 'check_out', 'total_price',
+    )
+    for listing_id, check_in, check_out, total_price in bookings.iterator():
+        for month, nights in nights_by_month(check_in, check_out).items():
+            buckets[(listing_id, month)]['nights_booked'] += nights
+        bucket = buckets[(listing_id, month_start(check_in))]
+        bucket['bookings_count'] += 1
+        bucket['booked_revenue'] += total_price
+
+    payments = Payment.objects.filter(
+        booking__listing_id__in=listing_ids, status=PAID_STATUS,
+    ).values_list('booking__listing_id', 'booking__check_in', 'amount')
+    for listing_id, check_in, amount in payments.iterator():
+        bucket = buckets.get((listing_id, month_start(check_in)))
+        if bucket is not None:
+            bucket['paid_revenue'] += amount
+
+    rows = [
+        ListingMonthlyStats(
+            listing_id=listing_id,
+            month=month,
+            nights_in_month=days_in_month(month),
+            **values,
+        )
+        for (listing_id, month), values in buckets.items()
+    ]
+    with transaction.atomic():
+        ListingMonthlyStats.objects.filter(listing_id__in=listing_ids).delete()
+        ListingMonthlyStats.objects.bulk_create(rows)
+    return len(rows)
+
+
+def parse_month(value):
+    """Parse a `YYYY-MM` query parameter into a month start date."""
+    year, month = value.split('-')
+    return date(int(year), int(month), 1)
@@ -10,7 +10,17 @@ logger = logging.getLogger(__name__)
 
 @shared_task(bind=True, max_retries=3)
 def send_booking_confirmation_email(self, booking_id, customer_email, customer_name, listing_title, check_in, check_out):
-    """Send booking confirmation email with retry logic."""
+    """Send booking confirmation email with retry logic.
+
+    Published from the outbox; a re-published copy of an already-sent
+    confirmation is skipped.
+    """
+    from .outbox import already_processed, mark_processed
+
+    if already_processed(self.request.id):
+        logger.info(f"Booking confirmation for booking {booking_id} already sent; skipping")
+        return {'status': 'skipped', 'booking_id': booking_id}
+
     try:
         subject = f"Booking Confirmation for {listing_title}"
         message = (
@@ -21,6 +31,7 @@ def send_booking_confirmation_email(self, booking_id, customer_email, customer_n
         from_email = "no-reply@alxtravelapp.com"
         
         result = send_mail(subject, message, from_email, [customer_email])
+        mark_processed(self.request.id)
         logger.info(f"Booking confirmation email sent for booking {booking_id}")
         return {'status': 'success', 'booking_id': booking_id, 'email_sent': result}
     
@@ -90,15 +101,22 @@ def process_payment_callback(self, payment_id, chapa_status):
     try:
         from .models import Payment
         payment = Payment.objects.get(id=payment_id)
-        
-        if chapa_status == 'success':
-            payment.status = 'Completed'
+
+        # Completed/Failed are terminal and served from cache by verify, so
+        # only an explicit Chapa result may set them; anything else (e.g.
+        # "pending") leaves the payment Pending.
+        if payment.is_final:
+            message = f"Payment {payment.tx_ref} already {payment.status}"
+        elif chapa_status == 'success':
+            payment.status = Payment.Status.COMPLETED
             message = f"Payment {payment.tx_ref} completed successfully"
-        else:
-            payment.status = 'Failed'
+        elif chapa_status == 'failed':
+            payment.status = Payment.Status.FAILED
             message = f"Payment {payment.tx_ref} failed"
-        
-        payment.save()
+        else:
+            message = f"Payment {payment.tx_ref} still pending ({chapa_status})"
+
+        payment.save(update_fields=['status'])
         logger.info(message)
         return {'status': 'success', 'message': message}
     
@@ -107,6 +125,65 @@ def process_payment_callback(self, payment_id, chapa_status):
         raise self.retry(exc=exc, countdown=60)
 
 
+@shared_task
+def rebuild_listing_stats(chunk_size=None):
+    """Rebuild the monthly listing stats rollup, one chunk of listings at a time."""
+    from django.conf import settings
+    from .models import Listing
+    from .stats import rebuild_stats_for_listings
+
+    chunk_size = chunk_size or getattr(settings, 'LISTING_STATS_REBUILD_CHUNK_SIZE', 200)
+    try:
+        listing_ids = list(Listing.objects.order_by('id').values_list('id', flat=True))
+        rows = 0
+        for start in range(0, len(listing_ids), chunk_size):
+            rows += rebuild_stats_for_listings(listing_ids[start:start + chunk_size])
+
+        logger.info(f"Rebuilt {rows} listing stats rows for {len(listing_ids)} listings")
+        return {'status': 'success', 'listings': len(listing_ids), 'rows': rows}
+
+    except Exception as exc:
+        logger.error(f"Error rebuilding listing stats: {exc}")
+        return {'status': 'error', 'error': str(exc)}
+
+
+@shared_task
+def dispatch_outbox():
+    """Drain due outbox rows to the broker, batch by batch."""
+    from .outbox import dispatch_pending
+
+    try:
+        total = 0
+        while True:
+            dispatched, failed = dispatch_pending()
+            total += dispatched
+            if failed or not dispatched:
+                break
+
+        if total:
+            logger.info(f"Dispatched {total} outbox messages")
+        return {'status': 'success', 'dispatched': total}
+
+    except Exception as exc:
+        logger.error(f"Error dispatching outbox: {exc}")
+        return {'status': 'error', 'error': str(exc)}
+
+
+@shared_task
+def purge_outbox():
+    """Remove outbox rows dispatched more than 7 days ago."""
+    from .outbox import purge_dispatched
+
+    try:
+        count = purge_dispatched(timezone.now() - timedelta(days=7))
+        logger.info(f"Purged {count} dispatched outbox messages")
+        return {'status': 'success', 'purged': count}
+
+    except Exception as exc:
+        logger.error(f"Error purging outbox: {exc}")
+        return {'status': 'error', 'error': str(exc)}
+
+
 @shared_task
 def debug_task():
     """Debug task for testing Celery setup."""
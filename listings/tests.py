@@ -1,3 +1,506 @@
-from django.test import TestCase
+import threading
+from datetime import date
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.middleware.csrf import _get_new_csrf_string
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from alx_travel_app import health
+
+from .availability import availability_for_range, night_masks
+from .idempotency import _cache_key
+from .models import (
+    Listing, Booking, ListingAvailabilityMonth, ListingMonthlyStats, OutboxMessage, Payment,
+    ListingRateOverride, LengthOfStayDiscount,
+)
+from .outbox import dispatch_pending, enqueue_task
+from .pricing import quote_stays
+from .stats import rebuild_stats_for_listings
+from .tasks import process_payment_callback, send_booking_confirmation_email
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def make_listing(**kwargs):
+    fields = {
+        'title': 'Beachfront Paradise',
+        'description': 'A stunning beachside villa.',
+        'location': 'Mombasa',
+        'price_per_night': '100.00',
+    }
+    fields.update(kwargs)
+    return Listing.objects.create(**fields)
+
+
+def make_booking(listing, check_in, check_out, **kwargs):
+    fields = {
+        'customer_name': 'Customer 1',
+        'customer_email': 'customer1@example.com',
+        'total_price': '0.00',
+    }
+    fields.update(kwargs)
+    return Booking.objects.create(listing=listing, check_in=check_in, check_out=check_out, **fields)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.listing = make_listing()
+        self.payload = {
+            'listing': self.listing.id,
+            'customer_name': 'Customer 1',
+            'customer_email': 'customer1@example.com',
+            'check_in': '2026-11-01',
+            'check_out': '2026-11-03',
+        }
+
+    def post(self, payload, key):
+        return self.client.post('/api/bookings/', payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_repeat_replays_stored_response(self):
+        first = self.post(self.payload, 'key-1')
+        second = self.post(self.payload, 'key-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_reused_key_with_different_payload_is_rejected(self):
+        self.post(self.payload, 'key-1')
+        response = self.post(dict(self.payload, customer_name='Someone Else'), 'key-1')
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0)
+    def test_in_flight_duplicate_times_out_with_conflict(self):
+        request = RequestFactory().post('/api/bookings/')
+        request.user = AnonymousUser()
+        cache.add(f"{_cache_key(request, 'key-1')}:lock", 'in-flight')
+
+        response = self.post(self.payload, 'key-1')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Booking.objects.count(), 0)
+
+    def test_session_authenticated_form_post_is_replayed(self):
+        # CSRF checks read the form body before the view runs.
+        client = APIClient(enforce_csrf_checks=True)
+        client.force_login(User.objects.create_user('traveller', password='secret'))
+        token = _get_new_csrf_string()
+        client.cookies['csrftoken'] = token
+
+        responses = [
+            client.post(
+                '/api/bookings/', self.payload,
+                HTTP_IDEMPOTENCY_KEY='key-1', HTTP_X_CSRFTOKEN=token,
+            )
+            for _ in range(2)
+        ]
+
+        self.assertEqual([response.status_code for response in responses], [201, 201])
+        self.assertEqual(responses[1]['Idempotent-Replayed'], 'true')
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PaymentInitializeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.booking = make_booking(make_listing(), date(2026, 11, 1), date(2026, 11, 3))
+
+    def initialize(self, key='key-1'):
+        return self.client.post(
+            '/api/payments/initialize/', {'booking_id': self.booking.id},
+            format='json', HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def chapa_response(self, status_code, body):
+        return mock.Mock(status_code=status_code, ok=status_code < 400, json=mock.Mock(return_value=body))
+
+    @override_settings(CHAPA_TIMEOUT=7.0)
+    def test_gateway_call_has_timeout_and_success_is_replayed(self):
+        body = {'status': 'success', 'data': {'checkout_url': 'https://checkout.chapa.co/x'}}
+        with mock.patch('requests.post', return_value=self.chapa_response(200, body)) as post:
+            first = self.initialize()
+            second = self.initialize()
+
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(post.call_args.kwargs['timeout'], 7.0)
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_gateway_error_is_not_stored_and_can_be_retried(self):
+        error = self.chapa_response(401, {'status': 'failed', 'message': 'Invalid API Key'})
+        success = self.chapa_response(200, {'status': 'success', 'data': {}})
+        with mock.patch('requests.post', side_effect=[error, success]):
+            first = self.initialize()
+            retry = self.initialize()
+
+        self.assertEqual(first.status_code, 502)
+        self.assertEqual(retry.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', retry)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_gateway_timeout_returns_bad_gateway(self):
+        import requests
+
+        with mock.patch('requests.post', side_effect=requests.Timeout):
+            response = self.initialize()
+
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(Payment.objects.count(), 0)
+
+
+class DerivedDataRefreshTests(TestCase):
+    def test_failing_refresh_does_not_fail_committed_booking(self):
+        listing = make_listing()
+        payload = {
+            'listing': listing.id,
+            'customer_name': 'Customer 1',
+            'customer_email': 'customer1@example.com',
+            'check_in': '2026-11-01',
+            'check_out': '2026-11-03',
+        }
+        with mock.patch('listings.stats.refresh_listing_months', side_effect=RuntimeError('boom')), \
+                self.assertLogs('django', level='ERROR'), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = APIClient().post('/api/bookings/', payload, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Booking.objects.count(), 1)
+
+
+class ListingStatsTests(TestCase):
+    def setUp(self):
+        self.listing = make_listing()
+        self.other = make_listing(title='Lakeside Cabin')
+        with self.captureOnCommitCallbacks(execute=True):
+            make_booking(self.listing, date(2026, 10, 30), date(2026, 11, 2), total_price='300.00')
+            paid = make_booking(self.listing, date(2026, 11, 10), date(2026, 11, 13), total_price='450.00')
+            make_booking(self.other, date(2026, 11, 5), date(2026, 11, 6), total_price='100.00')
+            Payment.objects.create(
+                booking=paid, amount='450.00', email='customer1@example.com',
+                first_name='Customer', last_name='One', tx_ref='tx-paid',
+                status=Payment.Status.COMPLETED,
+            )
+
+    def rows(self):
+        return list(ListingMonthlyStats.objects.order_by('listing_id', 'month').values(
+            'listing_id', 'month', 'bookings_count', 'nights_booked', 'nights_in_month',
+            'booked_revenue', 'paid_revenue',
+        ))
+
+    def test_nights_split_by_month_and_revenue_counted_in_check_in_month(self):
+        october = ListingMonthlyStats.objects.get(listing=self.listing, month=date(2026, 10, 1))
+        november = ListingMonthlyStats.objects.get(listing=self.listing, month=date(2026, 11, 1))
+
+        self.assertEqual((october.bookings_count, october.nights_booked), (1, 2))
+        self.assertEqual(october.booked_revenue, Decimal('300.00'))
+        self.assertEqual(october.paid_revenue, Decimal('0.00'))
+        self.assertEqual((november.bookings_count, november.nights_booked), (1, 4))
+        self.assertEqual(november.booked_revenue, Decimal('450.00'))
+        self.assertEqual(november.paid_revenue, Decimal('450.00'))
+
+    def test_incremental_refresh_matches_rebuild(self):
+        incremental = self.rows()
+
+        rebuild_stats_for_listings([self.listing.id, self.other.id])
+
+        self.assertEqual(self.rows(), incremental)
+
+    def test_listing_stats_endpoint(self):
+        response = APIClient().get(f'/api/listings/{self.listing.id}/stats/?from=2026-11&to=2026-11')
+
+        self.assertEqual(response.status_code, 200)
+        [month] = response.json()['months']
+        self.assertEqual(month['month'], '2026-11')
+        self.assertEqual(month['nights_booked'], 4)
+        self.assertEqual(month['occupancy_rate'], round(4 / 30, 4))
+        self.assertEqual(month['paid_revenue'], '450.00')
+
+    def test_stats_summary_endpoint(self):
+        response = APIClient().get('/api/listings/stats/?from=2026-11')
+
+        self.assertEqual(response.status_code, 200)
+        [month] = response.json()['months']
+        self.assertEqual(month['month'], '2026-11')
+        self.assertEqual((month['bookings_count'], month['nights_booked']), (2, 5))
+        self.assertEqual(month['occupancy_rate'], round(5 / 60, 4))
+        self.assertEqual(Decimal(month['booked_revenue']), Decimal('550.00'))
+        self.assertEqual(Decimal(month['paid_revenue']), Decimal('450.00'))
+
+
+class AvailabilityCalendarTests(TestCase):
+    def setUp(self):
+        self.listing = make_listing()
+
+    def booked_nights(self, start, end):
+        nights = availability_for_range(self.listing.id, start, end)
+        return [night for night, available in nights if not available]
+
+    def test_night_masks_split_across_month_boundary(self):
+        masks = night_masks(date(2026, 1, 30), date(2026, 2, 2))
+
+        self.assertEqual(masks, {
+            date(2026, 1, 1): (1 << 29) | (1 << 30),
+            date(2026, 2, 1): 1 << 0,
+        })
+
+    def test_night_masks_day_31_and_checkout_day_excluded(self):
+        self.assertEqual(night_masks(date(2026, 12, 31), date(2027, 1, 1)), {date(2026, 12, 1): 1 << 30})
+        self.assertEqual(night_masks(date(2026, 12, 31), date(2026, 12, 31)), {})
+
+    def test_new_month_row_includes_existing_bookings(self):
+        # An older booking the calendar never saw (e.g. created before deploy).
+        with self.captureOnCommitCallbacks(execute=False):
+            make_booking(self.listing, date(2026, 11, 1), date(2026, 11, 3))
+        self.assertFalse(ListingAvailabilityMonth.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_booking(self.listing, date(2026, 11, 10), date(2026, 11, 11))
+
+        self.assertEqual(
+            self.booked_nights(date(2026, 11, 1), date(2026, 12, 1)),
+            [date(2026, 11, 1), date(2026, 11, 2), date(2026, 11, 10)],
+        )
+
+    def test_deleting_overlapping_booking_keeps_other_nights(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = make_booking(self.listing, date(2026, 11, 1), date(2026, 11, 4))
+            make_booking(self.listing, date(2026, 11, 3), date(2026, 11, 5))
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+
+        self.assertEqual(
+            self.booked_nights(date(2026, 11, 1), date(2026, 11, 6)),
+            [date(2026, 11, 3), date(2026, 11, 4)],
+        )
+
+    def test_moving_overlapping_booking_clears_only_its_old_nights(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = make_booking(self.listing, date(2026, 10, 30), date(2026, 11, 3))
+            make_booking(self.listing, date(2026, 11, 2), date(2026, 11, 4))
+        moved.check_in, moved.check_out = date(2026, 12, 1), date(2026, 12, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.save()
+
+        self.assertEqual(
+            self.booked_nights(date(2026, 10, 28), date(2026, 12, 3)),
+            [date(2026, 11, 2), date(2026, 11, 3), date(2026, 12, 1)],
+        )
+
+
+class OutboxTests(TestCase):
+    def test_dispatch_publishes_with_outbox_task_id(self):
+        message = enqueue_task('listings.tasks.debug_task', dedup_key='debug:1')
+        enqueue_task('listings.tasks.debug_task', dedup_key='debug:1')
+
+        with mock.patch('listings.outbox.current_app.send_task') as send_task:
+            self.assertEqual(dispatch_pending(), (1, 0))
+
+        send_task.assert_called_once_with(
+            'listings.tasks.debug_task', args=[], kwargs={}, task_id=f"outbox-{message.id}",
+        )
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.Status.DISPATCHED)
+
+    def test_broker_error_backs_off_and_releases_rest_of_batch(self):
+        first = enqueue_task('listings.tasks.debug_task')
+        second = enqueue_task('listings.tasks.debug_task')
+
+        with mock.patch('listings.outbox.current_app.send_task', side_effect=ConnectionError('down')):
+            self.assertEqual(dispatch_pending(), (0, 1))
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.attempts, first.status), (1, OutboxMessage.Status.PENDING))
+        self.assertGreater(first.next_attempt_at, second.next_attempt_at)
+        self.assertEqual(second.attempts, 0)
+
+    def test_republished_confirmation_is_not_sent_twice(self):
+        message = enqueue_task('listings.tasks.send_booking_confirmation_email')
+        args = (1, 'customer1@example.com', 'Customer 1', 'Beachfront Paradise', '2026-11-01', '2026-11-03')
+
+        with mock.patch('listings.tasks.send_mail', return_value=1) as send_mail:
+            send_booking_confirmation_email.apply(args=args, task_id=f"outbox-{message.id}")
+            result = send_booking_confirmation_email.apply(args=args, task_id=f"outbox-{message.id}")
+
+        self.assertEqual(send_mail.call_count, 1)
+        self.assertEqual(result.result['status'], 'skipped')
+
+
+@override_settings(CACHES=LOCMEM_CACHE, HEALTH_CHECK_TIMEOUT=0.5)
+class HealthProbeTests(TestCase):
+    def setUp(self):
+        health._cached['expires'] = 0.0
+
+    def test_liveness(self):
+        response = self.client.get('/health/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'healthy')
+
+    def test_readiness_hides_failure_details(self):
+        def broker_down():
+            raise ConnectionError('redis://secret-host:6379 refused')
+
+        with mock.patch.dict(health.CHECKS, {'broker': broker_down}), \
+                self.assertLogs('alx_travel_app.health', level='ERROR'):
+            response = self.client.get('/ready/')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['checks'], {'database': 'ok', 'cache': 'ok', 'broker': 'error'})
+        self.assertNotIn(b'secret-host', response.content)
+
+    def test_hung_check_reports_timeout(self):
+        release = threading.Event()
+        with mock.patch.dict(health.CHECKS, {'broker': release.wait}), \
+                self.assertLogs('alx_travel_app.health', level='WARNING'):
+            ready, checks = health.run_checks()
+        release.set()
+
+        self.assertFalse(ready)
+        self.assertEqual(checks['broker'], 'timeout')
+
+
+class PaymentCallbackTests(TestCase):
+    def setUp(self):
+        booking = make_booking(make_listing(), date(2026, 11, 1), date(2026, 11, 3))
+        self.payment = Payment.objects.create(
+            booking=booking, amount='200.00', email='customer1@example.com',
+            first_name='Customer', last_name='One', tx_ref='tx-1',
+        )
+
+    def callback(self, chapa_status):
+        process_payment_callback.apply(args=(self.payment.id, chapa_status))
+        self.payment.refresh_from_db()
+        return self.payment.status
+
+    def test_pending_callback_leaves_payment_pending(self):
+        self.assertEqual(self.callback('pending'), Payment.Status.PENDING)
+
+    def test_explicit_results_are_final(self):
+        self.assertEqual(self.callback('failed'), Payment.Status.FAILED)
+        self.assertEqual(self.callback('success'), Payment.Status.FAILED)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PaymentVerifyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        booking = make_booking(make_listing(), date(2026, 11, 1), date(2026, 11, 3))
+        self.payment = Payment.objects.create(
+            booking=booking, amount='200.00', email='customer1@example.com',
+            first_name='Customer', last_name='One', tx_ref='tx-1',
+        )
+
+    def verify(self):
+        return APIClient().get('/api/payments/verify/', {'tx_ref': 'tx-1'})
+
+    def test_final_payments_are_answered_without_calling_chapa(self):
+        for final_status in Payment.TERMINAL_STATUSES:
+            cache.clear()
+            Payment.objects.filter(pk=self.payment.pk).update(status=final_status)
+            with mock.patch('requests.get') as get:
+                first = self.verify()
+                second = self.verify()
+
+            get.assert_not_called()
+            self.assertEqual((first.status_code, second.status_code), (200, 200))
+            self.assertEqual(second.json(), first.json())
+
+    def test_pending_answer_is_not_cached(self):
+        chapa = mock.Mock(json=mock.Mock(return_value={'status': 'success', 'data': {'status': 'pending'}}))
+        with mock.patch('requests.get', return_value=chapa) as get:
+            self.verify()
+            self.verify()
+
+        self.assertEqual(get.call_count, 2)
+        self.assertIsNone(cache.get('payment-verify:tx-1'))
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, Payment.Status.PENDING)
+
+
+class QuoteTests(TestCase):
+    def setUp(self):
+        self.listing = make_listing(price_per_night='100.00')
+
+    def quote(self, listing_id, check_in, check_out):
+        return quote_stays([(listing_id, check_in, check_out)])[0]
+
+    def test_overrides_apply_from_check_in_up_to_but_excluding_check_out(self):
+        ListingRateOverride.objects.create(listing=self.listing, date=date(2026, 11, 1), price_per_night='150.00')
+        ListingRateOverride.objects.create(listing=self.listing, date=date(2026, 11, 3), price_per_night='300.00')
+
+        quote = self.quote(self.listing.id, date(2026, 11, 1), date(2026, 11, 3))
+
+        self.assertEqual(quote['nights'], 2)
+        self.assertEqual(quote['total'], Decimal('250.00'))
+
+    def test_listing_discount_takes_precedence_over_global(self):
+        LengthOfStayDiscount.objects.create(min_nights=2, percent_off='10.00')
+        LengthOfStayDiscount.objects.create(listing=self.listing, min_nights=2, percent_off='5.00')
+        other = make_listing(price_per_night='100.00')
+
+        own, global_only = quote_stays([
+            (self.listing.id, date(2026, 11, 1), date(2026, 11, 3)),
+            (other.id, date(2026, 11, 1), date(2026, 11, 3)),
+        ])
+
+        self.assertEqual(own['discount_percent'], Decimal('5.00'))
+        self.assertEqual(global_only['discount_percent'], Decimal('10.00'))
+
+    def test_discount_rounds_half_up_to_cents(self):
+        listing = make_listing(price_per_night='10.10')
+        LengthOfStayDiscount.objects.create(listing=listing, min_nights=1, percent_off='5.00')
+
+        quote = self.quote(listing.id, date(2026, 11, 1), date(2026, 11, 2))
+
+        self.assertEqual(quote['discount'], Decimal('0.51'))
+        self.assertEqual(quote['total'], Decimal('9.59'))
+
+    def test_invalid_stays_get_error_entries(self):
+        unknown, reversed_dates = quote_stays([
+            (999999, date(2026, 11, 1), date(2026, 11, 3)),
+            (self.listing.id, date(2026, 11, 3), date(2026, 11, 3)),
+        ])
+
+        self.assertEqual(unknown['error'], 'Listing not found.')
+        self.assertEqual(reversed_dates['error'], 'check_out must be after check_in.')
+        self.assertNotIn('total', unknown)
+
+    def test_booking_total_is_priced_server_side(self):
+        response = APIClient().post('/api/bookings/', {
+            'listing': self.listing.id,
+            'customer_name': 'Customer 1',
+            'customer_email': 'customer1@example.com',
+            'check_in': '2026-11-01',
+            'check_out': '2026-11-03',
+            'total_price': '1.00',
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['total_price'], '200.00')
+
+    def test_update_keeps_price_unless_stay_changes(self):
+        booking = make_booking(self.listing, date(2026, 11, 1), date(2026, 11, 3), total_price='200.00')
+        Listing.objects.filter(pk=self.listing.pk).update(price_per_night='150.00')
+        client = APIClient()
+
+        renamed = client.patch(f'/api/bookings/{booking.id}/', {'customer_name': 'Renamed'}, format='json')
+        moved = client.patch(f'/api/bookings/{booking.id}/', {'check_out': '2026-11-04'}, format='json')
+
+        self.assertEqual(renamed.status_code, 200)
+        self.assertEqual(renamed.json()['total_price'], '200.00')
+        self.assertEqual(moved.json()['total_price'], '450.00')
@@ -1,11 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ListingViewSet, BookingViewSet, PaymentViewSet
+from .views import ListingViewSet, BookingViewSet, PaymentViewSet, QuoteViewSet
 
 router = DefaultRouter()
 router.register(r'listings', ListingViewSet, basename='listing')
 router.register(r'bookings', BookingViewSet, basename='booking')
 router.register(r'payments', PaymentViewSet, basename='payment')
+router.register(r'quotes', QuoteViewSet, basename='quote')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -4,35 +4,130 @@ from .serializers import ListingSerializer, BookingSerializer
 """
     A viewset for handling payments via Chapa.
     """
+from django.conf import settings
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-import requests
 import uuid
 import os
+from datetime import date, timedelta
 
-from .models import Listing, Booking, Payment
-from .serializers import ListingSerializer, BookingSerializer
-from .tasks import send_booking_confirmation_email
+from django.db import transaction
+from django.db.models import Sum
+from .models import Listing, Booking, Payment, ListingMonthlyStats
+from .serializers import (
+    ListingSerializer, BookingSerializer, ListingMonthlyStatsSerializer, QuoteRequestSerializer,
+)
+from .stats import days_in_month, parse_month
+from .availability import availability_for_range
+from .pricing import quote_stays
+from .outbox import enqueue_task
+from .idempotency import idempotent
+
+MAX_AVAILABILITY_DAYS = 366
 
 
 class ListingViewSet(viewsets.ModelViewSet):
-    """ViewSet for Listing objects."""
+    """ViewSet for Listing objects.
+
+    Reporting reads the precomputed `ListingMonthlyStats` rollup:
+    - `GET /listings/{id}/stats/?from=YYYY-MM&to=YYYY-MM` for one listing.
+    - `GET /listings/stats/?from=YYYY-MM&to=YYYY-MM` for totals per month.
+    `GET /listings/{id}/availability/?start=YYYY-MM-DD&end=YYYY-MM-DD` reads
+    the precomputed availability calendar (end is exclusive).
+    """
     queryset = Listing.objects.all().order_by('-created_at')
     serializer_class = ListingSerializer
 
+    def _stats_queryset(self, request):
+        queryset = ListingMonthlyStats.objects.all()
+        month_from = request.query_params.get('from')
+        month_to = request.query_params.get('to')
+        if month_from:
+            queryset = queryset.filter(month__gte=parse_month(month_from))
+        if month_to:
+            queryset = queryset.filter(month__lte=parse_month(month_to))
+        return queryset
+
+    @action(detail=True, methods=["get"], url_path="stats")
+    def stats(self, request, pk=None):
+        listing = get_object_or_404(Listing, pk=pk)
+        try:
+            queryset = self._stats_queryset(request).filter(listing=listing)
+        except ValueError:
+            return Response({'detail': 'Use YYYY-MM for from/to.'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = ListingMonthlyStatsSerializer(queryset.order_by('month'), many=True)
+        return Response({'listing': listing.id, 'months': serializer.data})
+
+    @action(detail=True, methods=["get"], url_path="availability")
+    def availability(self, request, pk=None):
+        listing = get_object_or_404(Listing, pk=pk)
+        try:
+            start = date.fromisoformat(request.query_params.get('start', date.today().isoformat()))
+            end = date.fromisoformat(
+                request.query_params.get('end', (start + timedelta(days=31)).isoformat())
+            )
+        except ValueError:
+            return Response({'detail': 'Use YYYY-MM-DD for start/end.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not start < end or (end - start).days > MAX_AVAILABILITY_DAYS:
+            return Response(
+                {'detail': f'end must be after start and at most {MAX_AVAILABILITY_DAYS} days later.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        nights = availability_for_range(listing.id, start, end)
+        return Response({
+            'listing': listing.id,
+            'listing_available': listing.available,
+            'start': start,
+            'end': end,
+            'nights': [{'date': night, 'available': available} for night, available in nights],
+        })
+
+    @action(detail=False, methods=["get"], url_path="stats")
+    def stats_summary(self, request):
+        try:
+            queryset = self._stats_queryset(request)
+        except ValueError:
+            return Response({'detail': 'Use YYYY-MM for from/to.'}, status=status.HTTP_400_BAD_REQUEST)
+        rows = queryset.values('month').annotate(
+            bookings_count=Sum('bookings_count'),
+            nights_booked=Sum('nights_booked'),
+            booked_revenue=Sum('booked_revenue'),
+            paid_revenue=Sum('paid_revenue'),
+        ).order_by('month')
+        listing_count = Listing.objects.count()
+        months = [
+            {
+                'month': row['month'].strftime('%Y-%m'),
+                'bookings_count': row['bookings_count'],
+                'nights_booked': row['nights_booked'],
+                'occupancy_rate': round(
+                    row['nights_booked'] / (listing_count * days_in_month(row['month'])), 4
+                ) if listing_count else 0.0,
+                'booked_revenue': str(row['booked_revenue']),
+                'paid_revenue': str(row['paid_revenue']),
+            }
+            for row in rows
+        ]
+        return Response({'months': months})
+
 
 class PaymentViewSet(viewsets.ViewSet):
     """Simple payment endpoints to initialize and verify Chapa transactions.
 
     - `POST /payments/initialize/` with `booking_id` to create a transaction.
     - `GET  /payments/verify/?tx_ref=...` to verify a transaction.
-    Note: Booking model does not include a `status` field, so only Payment
-    records are updated here.
+    Send an `Idempotency-Key` header on initialize so client retries replay
+    the first response instead of opening a second Chapa transaction.
+    Verifying a Completed or Failed payment is answered from the cache or DB
+    without calling Chapa. Completing a payment stamps `Booking.paid_at`.
     """
 
     @action(detail=False, methods=["post"], url_path="initialize")
+    @idempotent
     def initialize(self, request):
         booking_id = request.data.get('booking_id')
         booking = get_object_or_404(Booking, id=booking_id)
@@ -57,9 +152,24 @@ class PaymentViewSet(viewsets.ViewSet):
             'Content-Type': 'application/json',
         }
 
+        import requests  # deferred: only payment calls need the HTTP client
+
         url = 'https://api.chapa.co/v1/transaction/initialize'
-        resp = requests.post(url, json=payload, headers=headers)
-        chapa_response = resp.json()
+        try:
+            # Kept well below IDEMPOTENCY_LOCK_TIMEOUT so a slow gateway can't
+            # outlive the lock and let a retry start a second transaction.
+            resp = requests.post(url, json=payload, headers=headers, timeout=settings.CHAPA_TIMEOUT)
+            chapa_response = resp.json()
+        except (requests.RequestException, ValueError):
+            return Response(
+                {'detail': 'Payment gateway is unavailable.'},
+                status=status.HTTP_502_BAD_GATEWAY,
+            )
+
+        if not resp.ok:
+            # 5xx responses aren't stored by @idempotent, so the client can
+            # retry with the same key once the gateway error is resolved.
+            return Response(chapa_response, status=status.HTTP_502_BAD_GATEWAY)
 
         Payment.objects.create(
             booking=booking,
@@ -68,7 +178,7 @@ class PaymentViewSet(viewsets.ViewSet):
             first_name=booking.customer_name,
             last_name='Customer',
             tx_ref=tx_ref,
-            status='Pending',
+            status=Payment.Status.PENDING,
         )
 
         return Response(chapa_response, status=status.HTTP_200_OK)
@@ -76,7 +186,20 @@ class PaymentViewSet(viewsets.ViewSet):
     @action(detail=False, methods=["get"], url_path="verify")
     def verify(self, request):
         tx_ref = request.query_params.get('tx_ref')
+        cache_key = f'payment-verify:{tx_ref}'
+
+        # Finalized payments never change: serve them without calling Chapa.
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
+
         payment = get_object_or_404(Payment, tx_ref=tx_ref)
+        if payment.is_final:
+            data = _finalized_payment_response(payment)
+            cache.set(cache_key, data, timeout=settings.PAYMENT_VERIFY_CACHE_TTL)
+            return Response(data)
+
+        import requests
 
         secret_key = os.getenv('CHAPA_SECRET_KEY')
         url = f'https://api.chapa.co/v1/transaction/verify/{tx_ref}'
@@ -84,41 +207,95 @@ class PaymentViewSet(viewsets.ViewSet):
 
         resp = requests.get(url, headers=headers)
         chapa_data = resp.json()
-        status_value = chapa_data.get('data', {}).get('status')
+        transaction_data = chapa_data.get('data') or {}
+        status_value = transaction_data.get('status')
 
+        # Anything other than an explicit success/failure (e.g. "pending")
+        # leaves the payment Pending so a later verify can still complete it.
         if status_value == 'success':
-            payment.status = 'Completed'
-            payment.chapa_transaction_id = chapa_data.get('data', {}).get('id')
+            payment.status = Payment.Status.COMPLETED
+            payment.chapa_transaction_id = transaction_data.get('id')
             payment.save()
-        else:
-            payment.status = 'Failed'
+        elif status_value == 'failed':
+            payment.status = Payment.Status.FAILED
             payment.save()
 
+        if payment.is_final:
+            cache.set(cache_key, chapa_data, timeout=settings.PAYMENT_VERIFY_CACHE_TTL)
+
         return Response(chapa_data)
 
 
+def _finalized_payment_response(payment):
+    """Chapa-shaped verify payload built from a finalized Payment row."""
+    completed = payment.status == Payment.Status.COMPLETED
+    return {
+        'message': 'Payment details',
+        'status': 'success',
+        'data': {
+            'tx_ref': payment.tx_ref,
+            'id': payment.chapa_transaction_id,
+            'amount': str(payment.amount),
+            'email': payment.email,
+            'status': 'success' if completed else 'failed',
+        },
+    }
+
+
+class QuoteViewSet(viewsets.ViewSet):
+    """Batch price quotes for search results.
+
+    `POST /quotes/` with `{"stays": [{"listing", "check_in", "check_out"}, ...]}`
+    (up to 500 stays) returns one quote per stay, in order. Totals are exact
+    decimals including per-night rate overrides and length-of-stay discounts.
+    """
+
+    def create(self, request):
+        serializer = QuoteRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        stays = [
+            (stay['listing'], stay['check_in'], stay['check_out'])
+            for stay in serializer.validated_data['stays']
+        ]
+        quotes = quote_stays(stays)
+        for quote in quotes:
+            for field in ('subtotal', 'discount_percent', 'discount', 'total'):
+                if field in quote:
+                    quote[field] = str(quote[field])
+        return Response({'quotes': quotes})
+
+
 class BookingViewSet(viewsets.ModelViewSet):
-    """ViewSet for Booking objects with background email on create."""
+    """ViewSet for Booking objects with an outboxed confirmation email on create."""
     queryset = Booking.objects.all().order_by('-booked_at')
     serializer_class = BookingSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        paid = self.request.query_params.get('paid')
+        if paid is not None:
+            queryset = queryset.filter(paid_at__isnull=paid.lower() not in ('1', 'true', 'yes'))
+        return queryset
+
+    @idempotent
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        booking = serializer.save()
-
-        # Trigger background email task (Celery)
-        try:
-            send_booking_confirmation_email.delay(
-                booking.id,
-                booking.customer_email,
-                booking.customer_name,
-                booking.listing.title,
-                booking.check_in.strftime("%Y-%m-%d"),
-                booking.check_out.strftime("%Y-%m-%d"),
+        with transaction.atomic():
+            booking = serializer.save()
+            # Confirmation email is dispatched to Celery from the outbox, so the
+            # request never waits on the broker and the task commits with the booking.
+            enqueue_task(
+                'listings.tasks.send_booking_confirmation_email',
+                args=[
+                    booking.id,
+                    booking.customer_email,
+                    booking.customer_name,
+                    booking.listing.title,
+                    booking.check_in.strftime("%Y-%m-%d"),
+                    booking.check_out.strftime("%Y-%m-%d"),
+                ],
+                dedup_key=f"booking-confirmation:{booking.id}",
             )
-        except Exception:
-            # If the task system is not configured, don't break the request.
-            pass
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)